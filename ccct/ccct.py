@@ -3,21 +3,19 @@
 # Categorize credit card transactions and save them to a Google spreadsheet.
 
 import argparse
+import copy
+import functools
 import json
+import math
+import operator
 import os.path
-import re
 
 from datetime import datetime
 from pathlib import Path
-from jsonschema import validate
-from jsonschema.exceptions import ValidationError
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# The Google client libraries and ofxtools are slow to import and are loaded
+# where they are used, so --help and argument errors stay fast.
 from googleapiclient.errors import HttpError
-from ofxtools.Parser import OFXTree
 
 SCRIPT_DIR = str(Path(__file__).resolve().parent)
 CONFIG_DIR = SCRIPT_DIR + "/config"
@@ -26,8 +24,31 @@ DEFAULT_CONFIG_FILE = Path("~/.config/cctools/ccct.config.json").expanduser()
 
 ACCTTYPE = "CREDITLINE"
 SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
+# Sheets API requests that fail with a 429 (quota) or 5xx response are retried
+# with randomized exponential backoff this many times before giving up. Only
+# idempotent requests are retried: a retried create or addSheet whose first
+# response was lost would create a second spreadsheet or fail on the title.
+NUM_RETRIES = 5
 TITLE = "CreditCardTransactions"
+# Only the spreadsheet ID and worksheet titles/IDs are ever used, so skip
+# downloading the rest of the spreadsheet metadata.
+SPREADSHEET_FIELDS = "spreadsheetId,sheets.properties(sheetId,title)"
 TRANSACTION_COLUMNS = ["FITID", "DTPOSTED", "TRNTYPE", "TRNAMT", "NAME", "MEMO"]
+IDX_FITID, IDX_DTPOSTED, IDX_TRNTYPE, IDX_TRNAMT, IDX_NAME, IDX_MEMO = range(len(TRANSACTION_COLUMNS))
+
+ASCII_DIGITS = b"0123456789"
+
+def _is_all_digits(value, length):
+    """
+    Check that value is exactly length ASCII digits
+
+    Deleting every digit from the ASCII encoding leaves nothing behind only if
+    the string was all digits. Non-ASCII characters are replaced rather than
+    dropped so they still count against the length and fail the check. Raises
+    TypeError if value is not a string.
+    """
+    encoded = bytes(value, "ascii", "replace")
+    return len(encoded) == length and not encoded.translate(None, ASCII_DIGITS)
 
 #
 # ActionType functions called from _parse_args(). Neither the arguments nor the
@@ -46,11 +67,15 @@ def _is_valid_credential_dir(credential_dir):
 def _is_valid_bank_id(bank_id):
     error_msg = "ERROR: Invalid bank ID {}".format(bank_id)
     try:
-        if not re.match('^[0-9]{9}$', bank_id):
+        if not _is_all_digits(bank_id, 9):
             raise argparse.ArgumentTypeError(error_msg)
     except TypeError:
         raise argparse.ArgumentTypeError("ERROR: Bank ID missing!")
-    if sum(w * int(n) for w, n in zip([3, 7, 1] * 3, bank_id)) % 10 != 0:
+    # The bank ID is known to be nine ASCII digits at this point, so the digit
+    # values can be taken straight from their code points. ABA checksum
+    # weights repeat 3, 7, 1 across the nine digits.
+    d = [c - 48 for c in bank_id.encode("ascii")]
+    if (3 * (d[0] + d[3] + d[6]) + 7 * (d[1] + d[4] + d[7]) + (d[2] + d[5] + d[8])) % 10 != 0:
         raise argparse.ArgumentTypeError(error_msg)
     return bank_id
 
@@ -75,7 +100,7 @@ def _is_valid_fx_file(fx_file):
 def _is_valid_statement_date(statement_date):
     error_msg = "ERROR: Invalid statement date {}".format(statement_date)
     try:
-        if not re.match('^[0-9]{8}$', statement_date):
+        if not _is_all_digits(statement_date, 8):
             raise argparse.ArgumentTypeError(error_msg)
     except TypeError:
         raise argparse.ArgumentTypeError("ERROR: Statement date missing!")
@@ -83,14 +108,43 @@ def _is_valid_statement_date(statement_date):
         raise argparse.ArgumentTypeError(error_msg)
     return statement_date
 
+@functools.lru_cache(maxsize=4)
+def _load_schema_validator(schema_file, mtime):
+    """
+    Load a JSON schema and build its validator
+
+    Cached on the schema file's path and modification time so the schema is
+    only read, parsed and checked again when it changes on disk.
+    """
+    # jsonschema is slow to import, so only pay for it when a config file is
+    # actually in play.
+    from jsonschema.validators import validator_for
+
+    with open(schema_file, "r") as json_schema:
+        schema = json.load(json_schema)
+    cls = validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+@functools.lru_cache(maxsize=32)
+def _read_config_file(config_file, mtime, size):
+    """
+    Read and parse a JSON config file
+
+    Cached on the config file's path, modification time and size so repeated
+    loads of an unchanged file skip the read and parse.
+    """
+    with open(config_file, "r") as json_config:
+        return json.load(json_config)
+
 def _is_valid_config_file(config_file, schema_file=SCHEMA_FILE):
     error_msg = "ERROR: Invalid config file {}".format(config_file)
     try:
         config_file = Path(config_file).expanduser()
-        with open(schema_file, "r") as json_schema:
-            schema = json.load(json_schema)
-        with open(config_file, "r") as json_config:
-            config = json.load(json_config)
+        validator = _load_schema_validator(schema_file, os.path.getmtime(schema_file))
+        stat = os.stat(config_file)
+        # Callers own the returned config, so never hand out the cached copy.
+        config = copy.deepcopy(_read_config_file(config_file, stat.st_mtime, stat.st_size))
     except json.decoder.JSONDecodeError as e:
         raise argparse.ArgumentTypeError(str(e))
     except FileNotFoundError as e:
@@ -98,15 +152,21 @@ def _is_valid_config_file(config_file, schema_file=SCHEMA_FILE):
     except TypeError:
         raise argparse.ArgumentTypeError("ERROR: Invalid config file!")
 
-    try:
-        validate(instance=config, schema=schema)
-    except ValidationError as e:
-        raise argparse.ArgumentTypeError(error_msg + "\n" + str(e))
+    # Mirror jsonschema.validate() by reporting the most relevant error.
+    from jsonschema.exceptions import best_match
+    error = best_match(validator.iter_errors(config))
+    if error != None:
+        raise argparse.ArgumentTypeError(error_msg + "\n" + str(error))
     return config
 
-def _parse_args(exit_on_error=True):
-    global args
+@functools.lru_cache(maxsize=2)
+def _build_parser(exit_on_error=True):
+    """
+    Build the command line parser
 
+    The parser holds no per-parse state, so it is built once for each
+    exit_on_error setting and reused by every _parse_args() call.
+    """
     parser = argparse.ArgumentParser(
             description="Categorize Credit Card Transactions",
             exit_on_error=exit_on_error)
@@ -139,7 +199,12 @@ def _parse_args(exit_on_error=True):
                         default=DEFAULT_CONFIG_FILE,
                         type=_is_valid_config_file,
                         help="JSON formatted config file. See docs for details.")
-    args = parser.parse_args()
+    return parser
+
+def _parse_args(exit_on_error=True):
+    global args
+
+    args = _build_parser(exit_on_error).parse_args()
     return True
 
 def _load_from_config(default_config_file=DEFAULT_CONFIG_FILE):
@@ -194,15 +259,29 @@ def _resolve_config(exit_on_error=True, default_config_file=DEFAULT_CONFIG_FILE)
     if args.alloc_columns == None:
         raise argparse.ArgumentTypeError("Error: Allocation columns unknown!")
 
+    # Map each allocation column to its position once so allocation input can
+    # be looked up directly. The first occurrence of a repeated column wins.
+    args.alloc_columns_index = {}
+    for i, c in enumerate(args.alloc_columns):
+        args.alloc_columns_index.setdefault(c, i)
+
     return True
 
-def _parse_fx_file():
-    global ofx
+def _load_fx_file(fx_file):
+    """
+    Parse an OFX file into ofxtools models
+    """
+    from ofxtools.Parser import OFXTree
 
     parser = OFXTree()
-    with open(args.fx_file, 'rb') as f:
+    with open(fx_file, 'rb') as f:
         parser.parse(f)
-    ofx = parser.convert()
+    return parser.convert()
+
+def _parse_fx_file():
+    global ofx
+
+    ofx = _load_fx_file(args.fx_file)
 
     ofx_bank_id = ofx.bankmsgsrsv1[0].stmtrs.bankacctfrom.bankid
     ofx_accttype = ofx.bankmsgsrsv1[0].stmtrs.bankacctfrom.accttype
@@ -218,6 +297,10 @@ def _get_google_creds():
     global creds
     global service
 
+    from google.oauth2.credentials import Credentials
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from googleapiclient.discovery import build
+
     credentials_file = os.path.join(args.credential_dir, "credentials.json")
     token_file = os.path.join(args.credential_dir, "token.json")
 
@@ -243,23 +326,31 @@ def _get_google_creds():
 
 def _create_spreadsheet():
     global document_id
+    global sheet_id_by_title
     global spreadsheet
 
     try:
         if args.document_id != None:
             document_id = args.document_id
-            spreadsheet = service.spreadsheets().get(spreadsheetId=document_id).execute()
+            spreadsheet = (
+                service.spreadsheets()
+                    .get(spreadsheetId=document_id,
+                         fields=SPREADSHEET_FIELDS)
+                        .execute(num_retries=NUM_RETRIES)
+            )
             print(f"Spreadsheet Opened: {(TITLE)}")
         else:
             spreadsheet = (
                 service.spreadsheets()
                     .create(body={"properties": {"title": TITLE}},
-                            fields="spreadsheetId")
+                            fields=SPREADSHEET_FIELDS)
                         .execute()
             )
             document_id = spreadsheet.get('spreadsheetId')
             print(f"Spreadsheet Created and Opened: {(TITLE)}")
 
+        sheet_id_by_title = {sheet['properties']['title']: sheet['properties']['sheetId']
+                             for sheet in spreadsheet.get('sheets', '')}
         print(f"Spreadsheet ID: {(spreadsheet.get('spreadsheetId'))}")
     except HttpError as error:
         print(f"An error occurred: {error}")
@@ -274,175 +365,229 @@ def _get_sheet_id(title):
     can be created at a particular position index, but accessing and modifying
     worksheet contents should be done via the sheet ID.
     """
-    for sheet in spreadsheet.get('sheets', ''):
-        if sheet['properties']['title'] == title:
-            return sheet['properties']['sheetId']
-    return None
+    return sheet_id_by_title.get(title)
+
+def _get_worksheet_state():
+    """
+    Retrieve the worksheet header and the FITID of every classified transaction
+
+    Both ranges are fetched with a single batchGet so the read path costs one
+    round trip. A worksheet that does not exist yet has nothing to read.
+    """
+    global worksheet_header
+    global worksheet_header_expected
+    global worksheet_fitids
+
+    worksheet_header = []
+    worksheet_header_expected = [TRANSACTION_COLUMNS + args.alloc_columns]
+    worksheet_fitids = []
+
+    if _get_sheet_id(args.statement_date) == None:
+        print(f"Found {(len(worksheet_fitids))} worksheet transactions.")
+        return
 
-def _rename_worksheet(old_title: str, new_title: str):
     try:
-        request_body = {
-                'requests': [{
-                        'updateSheetProperties': {
-                                'properties': {
-                                        'sheetId': _get_sheet_id(old_title),
-                                        'title': new_title
-                                },
-                                'fields': 'title'
-                        }
-                }]
-        }
-        service.spreadsheets().batchUpdate(
-                spreadsheetId=document_id, body=request_body).execute()
+        ranges = ["{}!1:1".format(args.statement_date),
+                  "{}!A2:A".format(args.statement_date)]
+        result = service.spreadsheets().values().batchGet(
+                spreadsheetId=document_id, ranges=ranges).execute(num_retries=NUM_RETRIES)
+        value_ranges = result.get('valueRanges', [])
+        worksheet_header = value_ranges[0].get('values', [])
+
+        # Keep empty rows so list positions continue to map to worksheet rows.
+        worksheet_fitids = [row[0] if len(row) > 0 else None
+                            for row in value_ranges[1].get('values', [])]
+
+        print(f"Found {(len(worksheet_fitids))} worksheet transactions.")
     except HttpError as error:
+        # An unread worksheet must not be mistaken for an empty one, or the
+        # header and existing transactions would be written over.
         print(f"An error occurred: {error}")
-        return error
+        exit(1)
 
-def _create_statement_worksheet():
-    try:
-        sheets = spreadsheet.get('sheets', '')
-        sheet_names = [sheet['properties']['title'] for sheet in sheets]
+def _get_worksheet_transactions():
+    """
+    Retrieve classified transactions that might match an OFX transaction
 
-        response = None
-        sheet_id = None
-        if args.document_id == None:
-            _rename_worksheet("Sheet1", args.statement_date)
-        elif args.statement_date not in sheet_names:
-            request_body = {
-                'requests': [{
-                        'addSheet': {
-                                'properties': {
-                                        'title': args.statement_date,
-                                        'index': 0
-                                }
-                        }
-                }]
-            }
-            response = service.spreadsheets().batchUpdate(
-                        spreadsheetId=document_id, body=request_body).execute()
+    Only worksheet rows that share a FITID with the OFX file can match, so
+    only those rows are downloaded. Runs of adjacent rows are requested as a
+    single range and all ranges go out in one batchGet.
 
-            # On newly created worksheets, sheet_id is not immediately
-            # discoverable without looking at the batch response object.
-            sheet_id = response['replies'][0]['addSheet']['properties']['sheetId']
+    The same batchGet also reads everything below the last FITID. Rows there
+    can still hold content in columns B-F (a total or a note, for example),
+    and new transactions must be written after them.
+    """
+    global worksheet_transactions
+    global worksheet_row_count
 
-        # Google sheets makes a guess at column format. This guess turns out
-        # to be an automatic number for the transaction amount which cuts off
-        # characters when digits to the right of the decimal are zero. This
-        # makes it difficult to compare transactions to avoid duplication.
-        # Format the amount column to the numeric "@" format so the amounts are
-        # effectivey treated as text. One might think they could sidestep this
-        # complication by formatting all transaction amount strings to two
-        # decimal places, but the OFX specification (section 3.2.9.1) says
-        # little about the number of decimal places we should expect, except to
-        # leave the number format up to the client/server. Since foreign
-        # currency transactions require more than two decimal places, it makes
-        # more sense to keep the format consistent with the original and avoid
-        # making any assumptions.
-        if sheet_id == None:
-            sheet_id = _get_sheet_id(args.statement_date)
-        request_body = {
-                'requests': [{
-                        'repeatCell': {
-                                'range': {
-                                        'sheet_id': sheet_id,
-                                        'startColumnIndex': TRANSACTION_COLUMNS.index("TRNAMT"),
-                                        'endColumnIndex': TRANSACTION_COLUMNS.index("TRNAMT") + 1
-                                },
-                                'cell': {
-                                        'userEnteredFormat': {
-                                                'numberFormat': {
-                                                        'type': 'NUMBER',
-                                                        'pattern': '0.00'
-                                                }
-                                        }
-                                },
-                                'fields': "userEnteredFormat.numberFormat"
-                        }
-                },{
-                        # While we are at it, freeze the header row for usability.
-                        "updateSheetProperties": {
-                                "properties": {
-                                        "sheetId": sheet_id,
-                                        "gridProperties": {
-                                        "frozenRowCount": 1
-                                        }
-                                },
-                                "fields": "gridProperties.frozenRowCount"
-                        }
-                }]
-        }
-        service.spreadsheets().batchUpdate(
-                spreadsheetId=document_id, body=request_body).execute()
-    except HttpError as error:
-        print(f"An error occurred: {error}")
-        return error
+    worksheet_transactions = []
 
-def _get_worksheet_header():
-    global worksheet_header
+    ofx_fitids = {t.fitid for t in ofx.bankmsgsrsv1[0].stmtrs.banktranlist}
+    rows = [i + 2 for i, fitid in enumerate(worksheet_fitids) if fitid in ofx_fitids]
+
+    ranges = []
+    if len(rows) > 0:
+        start = end = rows[0]
+        for row in rows[1:]:
+            if row != end + 1:
+                ranges.append("{}!A{}:F{}".format(args.statement_date, start, end))
+                start = row
+            end = row
+        ranges.append("{}!A{}:F{}".format(args.statement_date, start, end))
+    ranges.append("{}!A{}:F".format(args.statement_date, len(worksheet_fitids) + 2))
 
     try:
-        range_name = "{}!1:1".format(args.statement_date)
-        result = service.spreadsheets().values().get(spreadsheetId=document_id, range=range_name).execute()
-        worksheet_header = result.get('values', [])
+        result = service.spreadsheets().values().batchGet(
+                spreadsheetId=document_id, ranges=ranges).execute(num_retries=NUM_RETRIES)
+        value_ranges = result.get('valueRanges', [])
+
+        # Rows used in A:F, not counting the header.
+        worksheet_row_count = len(worksheet_fitids) + len(value_ranges[-1].get('values', []))
+
+        # If the last field is empty (usually the memo field), google sheets
+        # returns a truncated transaction. When importing a batch of
+        # transactions, truncated transactions fail to be detected and we end up
+        # reprocessing old transactions.
+        #
+        # Rows are stored as tuples so they can be hashed for the duplicate
+        # check in _allocate_ofx_transactions.
+        width = len(TRANSACTION_COLUMNS)
+        padding = [None] * width
+        for value_range in value_ranges[:-1]:
+            worksheet_transactions += [tuple((row + padding)[:width])
+                                       for row in value_range.get('values', [])]
     except HttpError as error:
+        # Carrying on without these rows would classify and append every
+        # matching transaction a second time.
         print(f"An error occurred: {error}")
-        return error
+        exit(1)
 
 def _is_statement_worksheet_header_valid():
     if len(worksheet_header) == 0:
         return True
-    elif worksheet_header == [TRANSACTION_COLUMNS + args.alloc_columns]:
+    elif worksheet_header == worksheet_header_expected:
         return True
     return False
 
-def _set_statement_worksheet_header():
-    range_name = "{}!1:1".format(args.statement_date)
-    try:
-        body = {"values": [TRANSACTION_COLUMNS + args.alloc_columns]}
-        result = (
-            service.spreadsheets()
-            .values()
-            .update(
-                spreadsheetId=document_id,
-                range=range_name,
-                valueInputOption="USER_ENTERED",
-                body=body,
-            )
-            .execute()
-        )
-        return result
-    except HttpError as error:
-        print(f"An error occurred: {error}")
-        return error
-
-def _create_statement_worksheet_header():
-    _get_worksheet_header()
+def _verify_statement_worksheet_header():
     if not _is_statement_worksheet_header_valid():
         print("ERROR: Worksheet header appears to be invalid.")
         print("\tGot Header:      {}".format(worksheet_header))
-        print("\tExpected Header: {}".format([TRANSACTION_COLUMNS + args.alloc_columns]))
+        print("\tExpected Header: {}".format(worksheet_header_expected))
         exit(1)
-    if len(worksheet_header) == 0:
-        _set_statement_worksheet_header()
 
-def _get_statement_worksheet_transactions():
-    global worksheet_transactions
+def _create_statement_worksheet():
+    """
+    Create and format the statement worksheet
 
+    Every structural change (adding or renaming the worksheet, formatting the
+    amount column, freezing the header row, and writing a missing header) is
+    sent in a single batchUpdate.
+    """
     try:
-        range_name = "{}!A:F".format(args.statement_date)
-        result = service.spreadsheets().values().get(spreadsheetId=document_id, range=range_name).execute()
-        worksheet_transactions = result.get('values', [])
-
-        # Delete the header.
-        del worksheet_transactions[0]
-
-        # If the last field is empty (usually the memo field), google sheets
-        # returns a truncated transaction. When importing a batch of
-        # transactions, truncated transactions fail to be detected and we end up
-        # reprocessing old transactions.
-        worksheet_transactions = [row + [None] * (len(TRANSACTION_COLUMNS) - len(row)) for row in worksheet_transactions]
+        requests = []
+        sheet_id = None
+        if args.document_id == None:
+            # New spreadsheets come with a single default worksheet. Its title
+            # depends on the account's locale, so take it by position.
+            default_sheet = spreadsheet['sheets'][0]['properties']
+            sheet_id = default_sheet['sheetId']
+            requests.append({
+                    'updateSheetProperties': {
+                            'properties': {
+                                    'sheetId': sheet_id,
+                                    'title': args.statement_date
+                            },
+                            'fields': 'title'
+                    }
+            })
+        elif args.statement_date not in sheet_id_by_title:
+            # On newly created worksheets, sheet_id is not discoverable until
+            # the batch response comes back. Pick an unused sheet ID up front
+            # so the requests that follow can target the new worksheet within
+            # the same batch.
+            sheet_id = max(sheet_id_by_title.values(), default=0) + 1
+            requests.append({
+                    'addSheet': {
+                            'properties': {
+                                    'sheetId': sheet_id,
+                                    'title': args.statement_date,
+                                    'index': 0
+                            }
+                    }
+            })
 
-        print(f"Found {(len(worksheet_transactions))} worksheet transactions.")
+        # Google sheets makes a guess at column format. This guess turns out
+        # to be an automatic number for the transaction amount which cuts off
+        # characters when digits to the right of the decimal are zero. This
+        # makes it difficult to compare transactions to avoid duplication.
+        # Format the amount column to the numeric "@" format so the amounts are
+        # effectivey treated as text. One might think they could sidestep this
+        # complication by formatting all transaction amount strings to two
+        # decimal places, but the OFX specification (section 3.2.9.1) says
+        # little about the number of decimal places we should expect, except to
+        # leave the number format up to the client/server. Since foreign
+        # currency transactions require more than two decimal places, it makes
+        # more sense to keep the format consistent with the original and avoid
+        # making any assumptions.
+        if sheet_id == None:
+            sheet_id = _get_sheet_id(args.statement_date)
+        requests.append({
+                'repeatCell': {
+                        'range': {
+                                'sheet_id': sheet_id,
+                                'startColumnIndex': IDX_TRNAMT,
+                                'endColumnIndex': IDX_TRNAMT + 1
+                        },
+                        'cell': {
+                                'userEnteredFormat': {
+                                        'numberFormat': {
+                                                'type': 'NUMBER',
+                                                'pattern': '0.00'
+                                        }
+                                }
+                        },
+                        'fields': "userEnteredFormat.numberFormat"
+                }
+        })
+
+        # While we are at it, freeze the header row for usability.
+        requests.append({
+                "updateSheetProperties": {
+                        "properties": {
+                                "sheetId": sheet_id,
+                                "gridProperties": {
+                                "frozenRowCount": 1
+                                }
+                        },
+                        "fields": "gridProperties.frozenRowCount"
+                }
+        })
+
+        if len(worksheet_header) == 0:
+            requests.append({
+                    'updateCells': {
+                            'start': {
+                                    'sheetId': sheet_id,
+                                    'rowIndex': 0,
+                                    'columnIndex': 0
+                            },
+                            'rows': [{
+                                    'values': [{'userEnteredValue': {'stringValue': c}}
+                                               for c in worksheet_header_expected[0]]
+                            }],
+                            'fields': 'userEnteredValue'
+                    }
+            })
+
+        num_retries = NUM_RETRIES
+        if any('addSheet' in request for request in requests):
+            num_retries = 0
+        service.spreadsheets().batchUpdate(
+                spreadsheetId=document_id, body={'requests': requests}).execute(num_retries=num_retries)
+        if args.document_id == None:
+            sheet_id_by_title.pop(default_sheet['title'], None)
+        sheet_id_by_title[args.statement_date] = sheet_id
     except HttpError as error:
         print(f"An error occurred: {error}")
         return error
@@ -457,6 +602,25 @@ def _display_alloc_column_map(key=None):
     else:
             _display_alloc_column_map_key(key)
 
+def _apply_allocation(amount: float, allocated: float, amt: float, negative: bool):
+    """
+    Apply an allocation to a single column
+
+    Replaces whatever was previously allocated to the column with amt, clamped
+    to the remaining amount. Returns a tuple of the new remaining amount and
+    the allocation actually applied, or None if amt has the wrong sign.
+    """
+    # Credit Card DEBITS cannot be allocated as payment DEBITS and vice versa.
+    if (negative and amt > 0) or (not negative and amt < 0):
+        return None
+
+    if negative and amt < amount:
+        amt = amount
+    elif not negative and amt > amount:
+        amt = amount
+
+    return round(amount + allocated - amt, 2), amt
+
 def _get_allocations(amount: float):
     allocations = [0] * len(args.alloc_columns)
     original_amount = amount
@@ -465,15 +629,21 @@ def _get_allocations(amount: float):
     if amount < 0:
         negative = True
 
+    # The prompt only changes when an allocation is applied, so it is not
+    # rebuilt for help requests or invalid input.
+    prompt = None
     while amount != 0:
-        paired = [f"{a}({b})" if b != 0 else a for a, b in zip(args.alloc_columns, allocations)]
+        if prompt == None:
+            paired = [f"{a}({b})" if b != 0 else a for a, b in zip(args.alloc_columns, allocations)]
 
-        # If we have a map, enable the '?' command to display it.
-        if "alloc_columns_map" in args and args.alloc_columns_map != None:
-            paired.append('?')
+            # If we have a map, enable the '?' command to display it.
+            if "alloc_columns_map" in args and args.alloc_columns_map != None:
+                paired.append('?')
 
-        valid_inputs = f"[{', '.join(paired)}]"
-        user_input = input(f"Allocate Transaction {(valid_inputs)}[{(amount)}]: ")
+            valid_inputs = f"[{', '.join(paired)}]"
+            prompt = f"Allocate Transaction {(valid_inputs)}[{(amount)}]: "
+
+        user_input = input(prompt)
         alloc = user_input.split()
 
         if len(alloc) > 0:
@@ -482,10 +652,11 @@ def _get_allocations(amount: float):
             if col == "?":
                 _display_alloc_column_map()
                 continue
-            elif col not in args.alloc_columns:
+
+            alloc_index = args.alloc_columns_index.get(col)
+            if alloc_index == None:
                 continue
 
-            alloc_index = args.alloc_columns.index(col)
             amt = amount
 
             if len(alloc) > 1:
@@ -494,26 +665,35 @@ def _get_allocations(amount: float):
                     continue
                 try:
                     amt = float(alloc[1])
-
-                    # Credit Card DEBITS cannot be allocated as payment DEBITS
-                    # and vice versa.
-                    if (negative and amt > 0) or (not negative and amt < 0):
-                        continue
-
-                    if negative and amt < amount:
-                        amt = amount
-                    elif not negative and amt > amount:
-                        amt = amount
                 except ValueError:
                     continue
 
-            amount = amount + allocations[alloc_index]
-            amount = round(amount - amt, 2)
-            allocations[alloc_index] = amt
+            applied = _apply_allocation(amount, allocations[alloc_index], amt, negative)
+            if applied == None:
+                continue
+            amount, allocations[alloc_index] = applied
+            prompt = None
 
-    if round(sum(allocations),2) != original_amount:
+    if round(math.fsum(allocations), 2) != original_amount:
         raise Exception("Error: Transaction incorrectly allocated {} != {}".format(allocations, original_amount))
-    return ['' if x == 0 else x for x in allocations]
+    return [x or '' for x in allocations]
+
+def _get_ofx_transactions():
+    """
+    Yield each OFX transaction along with its worksheet row
+
+    Rows are built lazily as the allocation loop consumes them rather than
+    materialized for the whole statement up front.
+    """
+    for t in ofx.bankmsgsrsv1[0].stmtrs.banktranlist:
+        row = [None] * len(TRANSACTION_COLUMNS)
+        row[IDX_FITID] = t.fitid
+        row[IDX_DTPOSTED] = t.dtposted.isoformat()
+        row[IDX_TRNTYPE] = t.trntype
+        row[IDX_TRNAMT] = str(t.trnamt)
+        row[IDX_NAME] = t.name
+        row[IDX_MEMO] = t.memo
+        yield t, row
 
 def _allocate_ofx_transactions():
     global ofx_transactions
@@ -521,23 +701,19 @@ def _allocate_ofx_transactions():
     transactions = ofx.bankmsgsrsv1[0].stmtrs.banktranlist
     print("Found {} OFX transactions.".format(len(transactions)))
 
-    ofx_transactions = []
-    for i, t in enumerate(transactions):
-        ofx_transaction = [''] * len(TRANSACTION_COLUMNS)
-        ofx_transaction[TRANSACTION_COLUMNS.index("FITID")]    = t.fitid
-        ofx_transaction[TRANSACTION_COLUMNS.index("DTPOSTED")] = t.dtposted.isoformat()
-        ofx_transaction[TRANSACTION_COLUMNS.index("TRNTYPE")]  = t.trntype
-        ofx_transaction[TRANSACTION_COLUMNS.index("TRNAMT")]   = str(t.trnamt)
-        ofx_transaction[TRANSACTION_COLUMNS.index("NAME")]     = t.name
-        ofx_transaction[TRANSACTION_COLUMNS.index("MEMO")]     = t.memo
+    # Hash previously classified transactions once so the duplicate check
+    # below is a constant time lookup rather than a scan of the worksheet.
+    classified = set(worksheet_transactions)
 
+    ofx_transactions = []
+    for i, (t, ofx_transaction) in enumerate(_get_ofx_transactions()):
         # Due to some institutions occasionally reusing FITID values we are
         # forced to compare the entire transaction tuple rather than just the
         # FITID as the OFX specification originally intended. This approach will
         # fail if two affected transactions during a statement period have the
         # exact same dollar value, but there is nothing we can do about that
         # short of requiring an unreasonable amount of human intervention.
-        if ofx_transaction not in worksheet_transactions:
+        if tuple(ofx_transaction) not in classified:
             print("\nClassify transaction {} of {}:".format(i + 1, len(transactions)))
             print("\tTID:\t{}".format(t.fitid))
             print("\tDate:\t{}".format(t.dtposted.isoformat()))
@@ -567,10 +743,10 @@ def _write_ofx_transactions():
         print("No transactions to write...")
         return 0
 
-    ofx_transactions = sorted(ofx_transactions, key=lambda x: x[TRANSACTION_COLUMNS.index("DTPOSTED")])
+    ofx_transactions = sorted(ofx_transactions, key=operator.itemgetter(IDX_DTPOSTED))
     range_name = "{}!R{}C1:R{}C{}".format(args.statement_date,
-                        len(worksheet_transactions) + 2,
-                        len(worksheet_transactions) + 1 + len(ofx_transactions),
+                        worksheet_row_count + 2,
+                        worksheet_row_count + 1 + len(ofx_transactions),
                         len(ofx_transactions[0]))
     try:
         body = {"values": ofx_transactions}
@@ -583,7 +759,7 @@ def _write_ofx_transactions():
                 valueInputOption="USER_ENTERED",
                 body=body,
             )
-            .execute()
+            .execute(num_retries=NUM_RETRIES)
         )
         print(f"{result.get('updatedCells')} cells updated.")
         return result
@@ -597,9 +773,10 @@ def console_main():
     _get_google_creds()
 
     _create_spreadsheet()
+    _get_worksheet_state()
+    _verify_statement_worksheet_header()
     _create_statement_worksheet()
-    _create_statement_worksheet_header()
 
-    _get_statement_worksheet_transactions()
+    _get_worksheet_transactions()
     _allocate_ofx_transactions()
     _write_ofx_transactions()
@@ -4,23 +4,42 @@ import sys
 
 from . import const
 
+# Command line arguments keyed by flag, in the order they were first set.
+_ARGS = {}
+
+# Command line flags keyed by set_args() keyword.
+FLAGS = {"credential_dir": '--credential-dir',
+         "bank_id": '--bank-id',
+         "document_id": '--document-id',
+         "alloc_columns": '--alloc-columns',
+         "fx_file": '--fx-file',
+         "statement_date": '--statement-date',
+         "config_file": '--config-file'}
+
+def reset():
+    sys.argv = sys.argv[0:1]
+    _ARGS.clear()
+
+def commit():
+    sys.argv[1:] = [token for arg, value in _ARGS.items() for token in (arg, value)]
+
 def set_arg(arg, value=None):
     if arg == None:
         raise ValueError("Missing required argument!")
-    if not arg in sys.argv:
-        sys.argv.append(arg)
-        sys.argv.append(value)
-    else:
-        i = sys.argv.index(arg) + 1
-        sys.argv[i] = value
+    _ARGS[arg] = value
+    commit()
+
+def set_args(**values):
+    for name, value in values.items():
+        _ARGS[FLAGS[name]] = value
+    commit()
 
 def get_arg(arg=None):
-    i = sys.argv.index(arg) + 1
-    return
+    return _ARGS.get(arg)
 
 def set_all_required():
-    set_fx_file(const.VALID_FX_FILES[0])
-    set_statement_date(const.VALID_STATEMENT_DATES[0])
+    set_args(fx_file=const.VALID_FX_FILES[0],
+             statement_date=const.VALID_STATEMENT_DATES[0])
 
 def set_credential_dir(custom):
     arg = '--credential-dir'
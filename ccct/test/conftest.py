@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: MIT
+
+import functools
+import hashlib
+
+import pytest
+
+from pathlib import Path
+
+from .. import ccct
+
+# Nodes whose own call passed, and nodes that reported a failure (including a
+# failed subtest), during this run.
+passed = set()
+failed = set()
+
+def pytest_addoption(parser):
+    parser.addoption("--ccct-skip-unchanged", action="store_true",
+                     help="skip tests that passed last time if nothing in the "
+                          "ccct package has changed since")
+
+def pytest_configure(config):
+    global pytest_config
+    pytest_config = config
+
+def _skip_unchanged(config):
+    # The pass record lives in the pytest cache, so the option does nothing
+    # when the cache provider is disabled.
+    return config.getoption("--ccct-skip-unchanged") and hasattr(config, "cache")
+
+@functools.cache
+def _source_hash():
+    """
+    Hash every file in the ccct package
+
+    The tests read the tool, the test helpers and constants, the schema and
+    the assets, so a change to any of them has to rerun every test.
+    """
+    package_dir = Path(ccct.__file__).parent
+    digest = hashlib.sha1()
+    for path in sorted(package_dir.rglob("*")):
+        if path.is_file() and "__pycache__" not in path.parts:
+            digest.update(str(path.relative_to(package_dir)).encode())
+            digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def pytest_collection_modifyitems(config, items):
+    if not _skip_unchanged(config):
+        return
+    skip = pytest.mark.skip(reason="unchanged since last pass")
+    for item in items:
+        if config.cache.get(f"ccct/{item.nodeid}", None) == _source_hash():
+            item.add_marker(skip)
+
+def pytest_runtest_logreport(report):
+    if not _skip_unchanged(pytest_config):
+        return
+    # Passing subtests also report a passed call, and a later subtest can
+    # still fail, so only record a pass once the test's teardown has run.
+    if report.failed:
+        failed.add(report.nodeid)
+    elif isinstance(report, pytest.SubtestReport):
+        return
+    elif report.when == "call" and report.passed:
+        passed.add(report.nodeid)
+    elif report.when == "teardown" and report.nodeid in passed and report.nodeid not in failed:
+        pytest_config.cache.set(f"ccct/{report.nodeid}", _source_hash())
+
+@pytest.fixture(autouse=True)
+def ccct_state():
+    """
+    Give each test a clean copy of the ccct module globals
+
+    ccct keeps its run state (args, ofx, worksheet data, ...) in module
+    globals that only exist once set. Putting them back after every test
+    keeps tests independent of the order and the pytest-xdist worker they
+    run in.
+    """
+    saved = dict(vars(ccct))
+    yield
+    for name in vars(ccct).keys() - saved.keys():
+        delattr(ccct, name)
+    for name, value in saved.items():
+        if vars(ccct).get(name) is not value:
+            setattr(ccct, name, value)
@@ -0,0 +1,22 @@
+# SPDX-License-Identifier: MIT
+
+import copy
+import functools
+import os
+
+from ofxtools.Parser import OFXTree
+
+# Parsed OFX element trees keyed by path and modification time, so each test
+# asset is only parsed once per run and again only if it changes on disk.
+@functools.lru_cache(maxsize=None)
+def _parse(fx_file, mtime):
+    parser = OFXTree()
+    with open(fx_file, 'rb') as f:
+        parser.parse(f)
+    return parser
+
+# Stand-in for ccct._load_fx_file(). Converting a deep copy of the cached tree
+# gives every caller its own ofxtools models, so no test can see another
+# test's changes.
+def load_fx_file(fx_file):
+    return copy.deepcopy(_parse(fx_file, os.path.getmtime(fx_file))).convert()
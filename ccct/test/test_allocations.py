@@ -0,0 +1,60 @@
+# SPDX-License-Identifier: MIT
+
+import argparse
+import unittest
+
+from unittest.mock import patch
+
+from .. import ccct
+
+class TestAllocations(unittest.TestCase):
+    # Prompts expected while allocating 0.6 with input "x", "a 0.1", "c".
+    PROMPTS_SPLIT = ("Allocate Transaction [a, b, c][0.6]: ",
+                     "Allocate Transaction [a, b, c][0.6]: ",
+                     "Allocate Transaction [a(0.1), b, c][0.5]: ")
+
+    def setUp(self):
+        ccct.args = argparse.Namespace(alloc_columns=["a", "b", "c"],
+                                       alloc_columns_index={"a": 0, "b": 1, "c": 2})
+
+    def tearDown(self):
+        ccct.args = None
+
+    def test__apply_allocation_wrong_sign(self):
+        self.assertIsNone(ccct._apply_allocation(10.0, 0, -1.0, False))
+        self.assertIsNone(ccct._apply_allocation(-10.0, 0, 1.0, True))
+
+    def test__apply_allocation_partial(self):
+        self.assertEqual(ccct._apply_allocation(10.0, 0, 2.5, False), (7.5, 2.5))
+        self.assertEqual(ccct._apply_allocation(-10.0, 0, -2.5, True), (-7.5, -2.5))
+
+    def test__apply_allocation_clamped(self):
+        self.assertEqual(ccct._apply_allocation(10.0, 0, 20.0, False), (0, 10.0))
+        self.assertEqual(ccct._apply_allocation(-10.0, 0, -20.0, True), (0, -10.0))
+
+    def test__apply_allocation_replaces_previous(self):
+        # Reallocating a column returns its previous allocation to the pool.
+        self.assertEqual(ccct._apply_allocation(7.5, 2.5, 1.0, False), (9.0, 1.0))
+        self.assertEqual(ccct._apply_allocation(0.1, 0.2, 0.1, False), (0.2, 0.1))
+
+    def test__get_allocations_single(self):
+        with patch('builtins.input', side_effect=["b"]):
+            self.assertEqual(ccct._get_allocations(12.34), ['', 12.34, ''])
+
+    def test__get_allocations_split(self):
+        inputs = ["x", "a 0.1", "b 0.2", "c -1", "c"]
+        with patch('builtins.input', side_effect=inputs):
+            self.assertEqual(ccct._get_allocations(0.6), [0.1, 0.2, 0.3])
+        inputs = ["a -0.1", "b 5", "c"]
+        with patch('builtins.input', side_effect=inputs):
+            self.assertEqual(ccct._get_allocations(-0.6), [-0.1, '', -0.5])
+
+    def test__get_allocations_prompt(self):
+        with patch('builtins.input', side_effect=["x", "a 0.1", "c"]) as prompt:
+            self.assertEqual(ccct._get_allocations(0.6), [0.1, '', 0.5])
+        self.assertEqual(tuple(c.args[0] for c in prompt.call_args_list), self.PROMPTS_SPLIT)
+
+        ccct.args.alloc_columns_map = {"a": "A", "b": "B", "c": "C"}
+        with patch('builtins.input', side_effect=["b"]) as prompt:
+            ccct._get_allocations(0.6)
+        prompt.assert_called_once_with("Allocate Transaction [a, b, c, ?][0.6]: ")
@@ -14,11 +14,15 @@ class TestCommandLineInterface(unittest.TestCase):
     argv = sys.argv
 
     def setUp(self):
-        sys.argv = sys.argv[0:1]
+        args.reset()
 
     def tearDown(self):
         sys.argv = self.argv
 
+    def test_cli_parser_reused(self):
+        self.assertIs(ccct._build_parser(False), ccct._build_parser(False))
+        self.assertIsNot(ccct._build_parser(False), ccct._build_parser(True))
+
     def test_cli_none(self):
         self.assertRaises(argparse.ArgumentError, ccct._parse_args, False)
 
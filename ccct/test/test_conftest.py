@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: MIT
+
+import os
+
+from pathlib import Path
+
+# The directory holding the ccct package, so pytester subprocesses can import
+# the hooks under test.
+PACKAGE_PARENT = str(Path(__file__).resolve().parents[2])
+
+HOOKS = """
+from ccct.test.conftest import (pytest_addoption, pytest_configure,
+                                pytest_collection_modifyitems,
+                                pytest_runtest_logreport)
+"""
+
+TESTS = """
+import unittest
+
+class TestSkipUnchanged(unittest.TestCase):
+    def test_pass(self):
+        pass
+
+    def test_subtest_pass_then_fail(self):
+        for i in (1, 2):
+            with self.subTest(i=i):
+                self.assertEqual(i, 1)
+"""
+
+def test_skip_unchanged_subtest_failure(pytester, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", PACKAGE_PARENT)
+    pytester.makeconftest(HOOKS)
+    pytester.makepyfile(test_skip_unchanged=TESTS)
+
+    first = pytester.runpytest_subprocess("--ccct-skip-unchanged", "-v")
+    first.stdout.no_fnmatch_line("*SKIPPED*")
+
+    # Only the test without a failed subtest is skipped on the next run.
+    second = pytester.runpytest_subprocess("--ccct-skip-unchanged", "-v")
+    second.stdout.fnmatch_lines(["*::test_pass SKIPPED*"])
+    second.stdout.no_fnmatch_line("*::test_subtest_pass_then_fail SKIPPED*")
+    second.stdout.fnmatch_lines(["SUBFAILED(i=2) *::test_subtest_pass_then_fail"])
+
+def test_skip_unchanged_without_cache(pytester, monkeypatch):
+    monkeypatch.setenv("PYTHONPATH", PACKAGE_PARENT)
+    pytester.makeconftest(HOOKS)
+    pytester.makepyfile(test_skip_unchanged=TESTS)
+
+    for options in ((), ("--ccct-skip-unchanged",)):
+        result = pytester.runpytest_subprocess("-p", "no:cacheprovider", *options)
+        assert result.ret == 1
+        assert "INTERNALERROR" not in result.stdout.str() + result.stderr.str()
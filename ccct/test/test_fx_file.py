@@ -1,11 +1,15 @@
 # SPDX-License-Identifier: MIT
 
 import argparse
+import decimal
 import sys
 import unittest
 
+from unittest.mock import patch
+
 from . import args
 from . import const
+from . import fx
 from .. import ccct
 
 from pathlib import Path
@@ -13,49 +17,78 @@ from pathlib import Path
 class TestFXFile(unittest.TestCase):
     argv = sys.argv
 
+    # Worksheet rows expected from export.valid.qfx, one tuple per column.
+    FITIDS = (("20241126000InterestChargeonPurchases", "2445106NS8WXQ9TXV",
+               "20241126000Redacted1", "20241126000Redacted2")
+              + tuple(f"Redacted{n}" for n in range(3, 17)))
+    DTPOSTED = ("2024-11-26T12:00:00+00:00",) * 12 + ("2024-11-25T12:00:00+00:00",) * 6
+    TRNTYPES = ("DEBIT",) * 18
+    TRNAMTS = ("0.00", "-1.96", "0.00", "0.00", "-15.96", "-49.60", "-42.98",
+               "-55.00", "-1.20", "-8.23", "-77.51", "-35.00", "-24.00",
+               "-33.05", "-49.55", "-16.35", "-30.63", "-64.47")
+    NAMES = (("Interest Charge on Purchases", "ABCDEFG\t 123-456")
+             + tuple(f"Transaction {n}" for n in range(1, 17)))
+    MEMOS = ((None, "ABCDEFG\t 800-555-1212 OR", None, None)
+             + tuple(f"Memo for Transaction {n}" for n in range(3, 17)))
+
     def setUp(self):
-        sys.argv = sys.argv[0:1]
+        args.reset()
         ccct.args = None
         ccct.ofx = None
 
+        # Parse each asset once per run instead of once per test.
+        self.load_fx_file = ccct._load_fx_file
+        patcher = patch.object(ccct, "_load_fx_file", fx.load_fx_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
     def tearDown(self):
         sys.argv = self.argv
 
     def test__parse_fx_file(self):
         for i in const.VALID_FX_FILES:
             with self.subTest(i=i):
-                args.set_fx_file(i)
-                args.set_statement_date(const.VALID_STATEMENT_DATES[0])
-                args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-                args.set_bank_id("314074269")
-                args.set_alloc_columns(const.VALID_ALLOC_COLUMNS[0])
+                args.set_args(fx_file=i,
+                              statement_date=const.VALID_STATEMENT_DATES[0],
+                              credential_dir=const.VALID_CREDENTIAL_DIRS[0],
+                              bank_id="314074269",
+                              alloc_columns=const.VALID_ALLOC_COLUMNS[0])
                 self.assertTrue(ccct._resolve_config(default_config_file=None))
                 self.assertTrue(ccct._parse_fx_file())
                 self.setUp()
 
-    def test__parse_fx_file_invalid_bank_id(self):
-        args.set_fx_file(const.ASSETS_DIR + "/export.valid.qfx")
-        args.set_statement_date(const.VALID_STATEMENT_DATES[0])
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id("325081403")
-        args.set_alloc_columns(const.VALID_ALLOC_COLUMNS[0])
-        self.assertTrue(ccct._resolve_config(default_config_file=None))
-        self.assertRaises(Exception, ccct._parse_fx_file)
-
-    def test__parse_fx_file_invalid_accttype(self):
-        args.set_fx_file(const.ASSETS_DIR + "/export.invalid-1.qfx")
-        args.set_statement_date(const.VALID_STATEMENT_DATES[0])
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id("314074269")
-        args.set_alloc_columns(const.VALID_ALLOC_COLUMNS[0])
-        self.assertTrue(ccct._resolve_config(default_config_file=None))
-        self.assertRaises(Exception, ccct._parse_fx_file)
-
-    def test__parse_fx_file_invalid_accttype(self):
-        args.set_fx_file(const.ASSETS_DIR + "/export.invalid-2.qfx")
-        args.set_statement_date(const.VALID_STATEMENT_DATES[0])
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id("314074269")
-        args.set_alloc_columns(const.VALID_ALLOC_COLUMNS[0])
-        self.assertTrue(ccct._resolve_config(default_config_file=None))
-        self.assertRaises(Exception, ccct._parse_fx_file)
+    def test__parse_fx_file_invalid(self):
+        cases = [("bank_id",   "/export.valid.qfx",     "325081403"),
+                 ("accttype",  "/export.invalid-1.qfx", "314074269"),
+                 ("malformed", "/export.invalid-2.qfx", "314074269")]
+        args.set_args(statement_date=const.VALID_STATEMENT_DATES[0],
+                      credential_dir=const.VALID_CREDENTIAL_DIRS[0],
+                      alloc_columns=const.VALID_ALLOC_COLUMNS[0])
+        for name, fx_file, bank_id in cases:
+            with self.subTest(case=name):
+                args.set_args(fx_file=const.ASSETS_DIR + fx_file, bank_id=bank_id)
+                self.assertTrue(ccct._resolve_config(default_config_file=None))
+                self.assertRaises(Exception, ccct._parse_fx_file)
+
+    def test__load_fx_file(self):
+        # The cached loader hands out a fresh copy of what the real one parses.
+        cached = fx.load_fx_file(const.VALID_FX_FILES[0])
+        self.assertIsNot(fx.load_fx_file(const.VALID_FX_FILES[0]), cached)
+        for ofx in (self.load_fx_file(const.VALID_FX_FILES[0]), cached):
+            with self.subTest(ofx=ofx):
+                fitids = tuple(t.fitid for t in ofx.bankmsgsrsv1[0].stmtrs.banktranlist)
+                self.assertEqual(fitids, self.FITIDS)
+
+    def test_transaction_column_indexes(self):
+        indexes = (ccct.IDX_FITID, ccct.IDX_DTPOSTED, ccct.IDX_TRNTYPE,
+                   ccct.IDX_TRNAMT, ccct.IDX_NAME, ccct.IDX_MEMO)
+        self.assertEqual([ccct.TRANSACTION_COLUMNS[i] for i in indexes],
+                         ["FITID", "DTPOSTED", "TRNTYPE", "TRNAMT", "NAME", "MEMO"])
+
+    def test__get_ofx_transactions(self):
+        ccct.ofx = ccct._load_fx_file(const.VALID_FX_FILES[0])
+        transactions = list(ccct._get_ofx_transactions())
+        columns = tuple(zip(*(row for _, row in transactions)))
+        self.assertEqual(columns, (self.FITIDS, self.DTPOSTED, self.TRNTYPES,
+                                   self.TRNAMTS, self.NAMES, self.MEMOS))
+        self.assertEqual({type(t.trnamt) for t, _ in transactions}, {decimal.Decimal})
@@ -14,7 +14,7 @@ class TestLoadFromConfig(unittest.TestCase):
     argv = sys.argv
 
     def setUp(self):
-        sys.argv = sys.argv[0:1]
+        args.reset()
         ccct.args = None
 
     def tearDown(self):
@@ -52,17 +52,16 @@ class TestLoadFromConfig(unittest.TestCase):
         args.set_all_required()
 
         # Set CLI values that differ from config file values.
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id(const.VALID_BANK_IDS[0])
-        args.set_document_id(const.VALID_DOCUMENT_ID)
+        args.set_args(credential_dir=const.VALID_CREDENTIAL_DIRS[0],
+                      bank_id=const.VALID_BANK_IDS[0],
+                      document_id=const.VALID_DOCUMENT_ID)
 
         self.assertTrue(ccct._parse_args())
         self.assertTrue(ccct._load_from_config(const.VALID_CONFIG))
 
         # Ensure CLI values override config file values.
-        self.assertTrue(ccct.args.credential_dir == Path(const.VALID_CREDENTIAL_DIRS[0]).expanduser())
-        self.assertTrue(ccct.args.bank_id == const.VALID_BANK_IDS[0])
-        self.assertTrue(ccct.args.document_id == const.VALID_DOCUMENT_ID)
+        self.assertEqual((ccct.args.credential_dir, ccct.args.bank_id, ccct.args.document_id),
+                         (const.VALID_CREDENTIAL_PATHS[0], const.VALID_BANK_IDS[0], const.VALID_DOCUMENT_ID))
 
         # Belt and suspenders to potentially catch changes to assets.
         self.assertFalse(ccct.args.credential_dir == Path("~/.google").expanduser())
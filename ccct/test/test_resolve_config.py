@@ -12,7 +12,7 @@ class TestResolveConfig(unittest.TestCase):
     argv = sys.argv
 
     def setUp(self):
-        sys.argv = sys.argv[0:1]
+        args.reset()
         ccct.args = None
 
     def tearDown(self):
@@ -32,13 +32,16 @@ class TestResolveConfig(unittest.TestCase):
 
     def test__resolve_config_add_bank_id(self):
         args.set_all_required()
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id(const.VALID_BANK_IDS[0])
+        args.set_args(credential_dir=const.VALID_CREDENTIAL_DIRS[0],
+                      bank_id=const.VALID_BANK_IDS[0])
         self.assertRaises(argparse.ArgumentTypeError, ccct._resolve_config, default_config_file=None)
 
     def test__resolve_config_add_alloc_columns(self):
         args.set_all_required()
-        args.set_credential_dir(const.VALID_CREDENTIAL_DIRS[0])
-        args.set_bank_id(const.VALID_BANK_IDS[0])
-        args.set_alloc_columns(const.VALID_ALLOC_COLUMNS[0])
+        args.set_args(credential_dir=const.VALID_CREDENTIAL_DIRS[0],
+                      bank_id=const.VALID_BANK_IDS[0],
+                      alloc_columns=const.VALID_ALLOC_COLUMNS[0])
         self.assertTrue(ccct._resolve_config(None))
+        for i, c in enumerate(ccct.args.alloc_columns):
+            with self.subTest(c=c):
+                self.assertEqual(ccct.args.alloc_columns_index[c], i)
@@ -8,6 +8,15 @@ from . import const
 from .. import ccct
 
 class TestValidationAction(unittest.TestCase):
+    def test__is_all_digits(self):
+        for i in ["", "1234567", "123456789", "1234567a", "1234567\n", "１２３４５６７８"]:
+            with self.subTest(i=i):
+                self.assertFalse(ccct._is_all_digits(i, 8))
+        with self.subTest():
+            self.assertTrue(ccct._is_all_digits("12345678", 8))
+        with self.subTest():
+            self.assertRaises(TypeError, ccct._is_all_digits, None, 8)
+
     def test__is_valid_credential_dir(self):
         for i in const.INVALID_CREDENTIAL_DIRS:
             with self.subTest(i=i):
@@ -17,10 +26,7 @@ class TestValidationAction(unittest.TestCase):
                 self.assertTrue(os.path.exists(ccct._is_valid_credential_dir(i)))
 
     def test__is_valid_bank_id(self):
-        for i in const.INVALID_BANK_ID_STRINGS:
-            with self.subTest(i=i):
-                self.assertRaises(argparse.ArgumentTypeError, ccct._is_valid_bank_id, i)
-        for i in const.INVALID_BANK_ID_NUMBERS:
+        for i in const.INVALID_BANK_IDS:
             with self.subTest(i=i):
                 self.assertRaises(argparse.ArgumentTypeError, ccct._is_valid_bank_id, i)
         for i in const.VALID_BANK_IDS:
@@ -54,6 +60,24 @@ class TestValidationAction(unittest.TestCase):
             with self.subTest(i=i):
                 self.assertTrue(ccct._is_valid_statement_date(i))
 
+    def test__load_schema_validator(self):
+        for i in const.VALID_SCHEMA_FILES:
+            with self.subTest(i=i):
+                mtime = os.path.getmtime(i)
+                validator = ccct._load_schema_validator(i, mtime)
+                self.assertIs(ccct._load_schema_validator(i, mtime), validator)
+                self.assertIsNot(ccct._load_schema_validator(i, mtime + 1), validator)
+
+    def test__read_config_file(self):
+        stat = os.stat(const.VALID_CONFIG)
+        config = ccct._read_config_file(const.VALID_CONFIG, stat.st_mtime, stat.st_size)
+        self.assertIs(ccct._read_config_file(const.VALID_CONFIG, stat.st_mtime, stat.st_size), config)
+        self.assertIsNot(ccct._read_config_file(const.VALID_CONFIG, stat.st_mtime + 1, stat.st_size), config)
+
+        # Each caller gets its own copy of the cached config.
+        self.assertIsNot(ccct._is_valid_config_file(const.VALID_CONFIG), config)
+        self.assertEqual(ccct._is_valid_config_file(const.VALID_CONFIG), config)
+
     def test__is_valid_config_file(self):
         for i in const.MISSING_CONFIG_FILES:
             with self.subTest(i=i):
@@ -66,13 +90,8 @@ class TestValidationAction(unittest.TestCase):
         for i in const.VALID_SCHEMA_FILES:
             with self.subTest(i=i):
                 config = ccct._is_valid_config_file(const.VALID_CONFIG, i)
-                self.assertTrue(config["credential_dir"] == "~/.google")
-                self.assertTrue(config["bank_id"] == 314074269)
-                self.assertTrue(config["document_id"] == "2CZrPH3M-Lg-TmD5luXu7loG3svABgfGP23txXbar7dg")
-                self.assertTrue(config["alloc_columns"][0]["short"] == "ap")
-                self.assertTrue(config["alloc_columns"][0]["long"] == "Amazon Purchases")
-                self.assertTrue(config["alloc_columns"][1]["short"] == "pc")
-                self.assertTrue(config["alloc_columns"][1]["long"] == "Petcare")
-                self.assertTrue(config["alloc_columns"][2]["short"] == "af")
-                self.assertTrue(config["alloc_columns"][2]["long"] == "Auto Fuel")
+                self.assertEqual((config["credential_dir"], config["bank_id"], config["document_id"]),
+                                 ("~/.google", 314074269, "2CZrPH3M-Lg-TmD5luXu7loG3svABgfGP23txXbar7dg"))
+                self.assertEqual([(c["short"], c["long"]) for c in config["alloc_columns"][0:3]],
+                                 [("ap", "Amazon Purchases"), ("pc", "Petcare"), ("af", "Auto Fuel")])
 
@@ -0,0 +1,190 @@
+# SPDX-License-Identifier: MIT
+
+import argparse
+import unittest
+
+from googleapiclient.errors import HttpError
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from .. import ccct
+
+def _ofx(fitids):
+    transactions = [SimpleNamespace(fitid=f) for f in fitids]
+    return SimpleNamespace(bankmsgsrsv1=[SimpleNamespace(stmtrs=SimpleNamespace(banktranlist=transactions))])
+
+class TestWorksheet(unittest.TestCase):
+    STATEMENT_DATE = "20241126"
+    HEADER = [ccct.TRANSACTION_COLUMNS + ["a", "b"]]
+
+    def setUp(self):
+        self.service = MagicMock()
+        self.values = self.service.spreadsheets.return_value.values.return_value
+        self.batch_update = self.service.spreadsheets.return_value.batchUpdate
+        patcher = patch.multiple(ccct, create=True,
+                                 args=argparse.Namespace(statement_date=self.STATEMENT_DATE,
+                                                         document_id="DOCUMENT",
+                                                         alloc_columns=["a", "b"]),
+                                 service=self.service,
+                                 document_id="DOCUMENT",
+                                 spreadsheet=None,
+                                 sheet_id_by_title=None,
+                                 ofx=None,
+                                 ofx_transactions=None,
+                                 worksheet_header=None,
+                                 worksheet_header_expected=self.HEADER,
+                                 worksheet_fitids=None,
+                                 worksheet_row_count=None,
+                                 worksheet_transactions=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _batch_update(self):
+        requests = self.batch_update.call_args.kwargs["body"]["requests"]
+        num_retries = self.batch_update.return_value.execute.call_args.kwargs["num_retries"]
+        return requests, num_retries
+
+    def _formatting(self, sheet_id):
+        return [{'repeatCell': {
+                        'range': {'sheet_id': sheet_id,
+                                  'startColumnIndex': ccct.IDX_TRNAMT,
+                                  'endColumnIndex': ccct.IDX_TRNAMT + 1},
+                        'cell': {'userEnteredFormat': {'numberFormat': {'type': 'NUMBER',
+                                                                        'pattern': '0.00'}}},
+                        'fields': "userEnteredFormat.numberFormat"}},
+                {"updateSheetProperties": {
+                        "properties": {"sheetId": sheet_id,
+                                       "gridProperties": {"frozenRowCount": 1}},
+                        "fields": "gridProperties.frozenRowCount"}}]
+
+    def _header(self, sheet_id):
+        return [{'updateCells': {
+                        'start': {'sheetId': sheet_id, 'rowIndex': 0, 'columnIndex': 0},
+                        'rows': [{'values': [{'userEnteredValue': {'stringValue': c}}
+                                             for c in self.HEADER[0]]}],
+                        'fields': 'userEnteredValue'}}]
+
+    def test__get_worksheet_state_missing(self):
+        ccct.sheet_id_by_title = {"20241125": 0}
+
+        with patch('builtins.print'):
+            ccct._get_worksheet_state()
+
+        self.values.batchGet.assert_not_called()
+        self.assertEqual((ccct.worksheet_header, ccct.worksheet_fitids), ([], []))
+
+    def test__get_worksheet_state(self):
+        ccct.sheet_id_by_title = {self.STATEMENT_DATE: 0}
+        self.values.batchGet.return_value.execute.return_value = {"valueRanges": [
+                {"values": self.HEADER},
+                {"values": [["X1"], [], ["X3"]]}]}
+
+        with patch('builtins.print'):
+            ccct._get_worksheet_state()
+
+        self.assertEqual(self.values.batchGet.call_args.kwargs["ranges"],
+                         ["20241126!1:1", "20241126!A2:A"])
+        self.assertEqual(ccct.worksheet_header, self.HEADER)
+        self.assertEqual(ccct.worksheet_fitids, ["X1", None, "X3"])
+
+    def test__get_worksheet_state_http_error(self):
+        ccct.sheet_id_by_title = {self.STATEMENT_DATE: 0}
+        error = HttpError(MagicMock(status=503, reason="Service Unavailable"), b"")
+        self.values.batchGet.return_value.execute.side_effect = error
+
+        with patch('builtins.print'):
+            with self.assertRaises(SystemExit) as context:
+                ccct._get_worksheet_state()
+        self.assertEqual(context.exception.code, 1)
+
+    def test__create_statement_worksheet_new_spreadsheet(self):
+        ccct.args.document_id = None
+        ccct.spreadsheet = {"sheets": [{"properties": {"sheetId": 0, "title": "Tabelle1"}}]}
+        ccct.sheet_id_by_title = {"Tabelle1": 0}
+        ccct.worksheet_header = []
+
+        ccct._create_statement_worksheet()
+
+        rename = [{'updateSheetProperties': {
+                        'properties': {'sheetId': 0, 'title': self.STATEMENT_DATE},
+                        'fields': 'title'}}]
+        self.assertEqual(self._batch_update(),
+                         (rename + self._formatting(0) + self._header(0), ccct.NUM_RETRIES))
+        self.assertEqual(ccct.sheet_id_by_title, {self.STATEMENT_DATE: 0})
+
+    def test__create_statement_worksheet_new_worksheet(self):
+        ccct.sheet_id_by_title = {"20241025": 0, "20240925": 7}
+        ccct.worksheet_header = []
+
+        ccct._create_statement_worksheet()
+
+        # addSheet is not idempotent, so the batch is never retried.
+        add = [{'addSheet': {
+                        'properties': {'sheetId': 8, 'title': self.STATEMENT_DATE, 'index': 0}}}]
+        self.assertEqual(self._batch_update(), (add + self._formatting(8) + self._header(8), 0))
+        self.assertEqual(ccct.sheet_id_by_title[self.STATEMENT_DATE], 8)
+
+    def test__create_statement_worksheet_existing_worksheet(self):
+        ccct.sheet_id_by_title = {"20241025": 0, self.STATEMENT_DATE: 3}
+        ccct.worksheet_header = self.HEADER
+
+        ccct._create_statement_worksheet()
+
+        self.assertEqual(self._batch_update(), (self._formatting(3), ccct.NUM_RETRIES))
+
+    def test__get_worksheet_transactions(self):
+        ccct.worksheet_fitids = ["X1", "X2", None, "X3", "X4", "Z"]
+        ccct.ofx = _ofx(["X1", "X2", "X4"])
+        self.values.batchGet.return_value.execute.return_value = {"valueRanges": [
+                {"values": [["X1", "D1", "DEBIT", "-1.00", "N1", "M1"],
+                            ["X2", "D2", "DEBIT", "-2.00", "N2"]]},
+                {"values": [["X4", "D4", "CREDIT", "4.00", "N4", "M4"]]},
+                {"values": [[], ["", "", "", "=SUM(D2:D7)"]]}]}
+
+        ccct._get_worksheet_transactions()
+
+        # Adjacent rows share a range and the empty row 4 splits them.
+        self.assertEqual(self.values.batchGet.call_args.kwargs["ranges"],
+                         ["20241126!A2:F3", "20241126!A6:F6", "20241126!A8:F"])
+        # Truncated rows are padded so they compare equal to OFX rows.
+        self.assertEqual(ccct.worksheet_transactions,
+                         [("X1", "D1", "DEBIT", "-1.00", "N1", "M1"),
+                          ("X2", "D2", "DEBIT", "-2.00", "N2", None),
+                          ("X4", "D4", "CREDIT", "4.00", "N4", "M4")])
+        # Content below the last FITID still counts as used.
+        self.assertEqual(ccct.worksheet_row_count, 8)
+
+    def test__get_worksheet_transactions_no_match(self):
+        ccct.worksheet_fitids = ["X1", "X2"]
+        ccct.ofx = _ofx(["Y1"])
+        self.values.batchGet.return_value.execute.return_value = {"valueRanges": [{}]}
+
+        ccct._get_worksheet_transactions()
+
+        self.assertEqual(self.values.batchGet.call_args.kwargs["ranges"], ["20241126!A4:F"])
+        self.assertEqual(ccct.worksheet_transactions, [])
+        self.assertEqual(ccct.worksheet_row_count, 2)
+
+    def test__get_worksheet_transactions_http_error(self):
+        ccct.worksheet_fitids = ["X1"]
+        ccct.ofx = _ofx(["X1"])
+        error = HttpError(MagicMock(status=503, reason="Service Unavailable"), b"")
+        self.values.batchGet.return_value.execute.side_effect = error
+
+        with patch('builtins.print'):
+            with self.assertRaises(SystemExit) as context:
+                ccct._get_worksheet_transactions()
+        self.assertEqual(context.exception.code, 1)
+
+    def test__write_ofx_transactions(self):
+        ccct.worksheet_row_count = 8
+        ccct.ofx_transactions = [["X6", "2024-11-26", "DEBIT", "-6.00", "N6", None, ""],
+                                 ["X5", "2024-11-25", "DEBIT", "-5.00", "N5", None, ""]]
+        self.values.update.return_value.execute.return_value = {"updatedCells": 14}
+
+        with patch('builtins.print'):
+            ccct._write_ofx_transactions()
+
+        kwargs = self.values.update.call_args.kwargs
+        self.assertEqual(kwargs["range"], "20241126!R10C1:R11C7")
+        self.assertEqual([row[0] for row in kwargs["body"]["values"]], ["X5", "X6"])